@@ -9,10 +9,14 @@ class EmailConfig(AppConfig):
     verbose_name = "Harry"
 
     def ready(self):
-        if importlib.util.find_spec("anymail") is None:
-            raise ImportError(
-                "harry.email requires django-anymail, which harry does not install "
-                "by default. Install the extra: "
-                "uv add 'harry[email] @ git+https://github.com/hkhanna/django-harry'"
-            )
+        for module, package in (
+            ("anymail", "django-anymail"),
+            ("django_tasks", "django-tasks"),
+        ):
+            if importlib.util.find_spec(module) is None:
+                raise ImportError(
+                    f"harry.email requires {package}, which harry does not install "
+                    "by default. Install the extra: "
+                    "uv add 'harry[email] @ git+https://github.com/hkhanna/django-harry'"
+                )
         import harry.email.signals  # noqa: F401
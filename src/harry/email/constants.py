@@ -1,3 +1,6 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+
 from django.db import models
 
 
@@ -19,3 +22,9 @@ class EmailMessage:
         OPENED = "opened"
         CLICKED = "clicked"
         UNKNOWN = "unknown"
+
+    # anymail event types that share a value with a Status map onto it; webhook
+    # processing treats anything else as UNKNOWN.
+    STATUS_BY_EVENT_TYPE: Mapping[str, Status] = MappingProxyType(
+        {status.value: status for status in Status}
+    )
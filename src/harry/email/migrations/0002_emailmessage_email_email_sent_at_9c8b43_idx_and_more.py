@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailmessage',
+            index=models.Index(fields=['sent_at'], name='email_email_sent_at_9c8b43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailmessage',
+            index=models.Index(fields=['to_email', 'template_prefix', 'sent_at'], name='email_email_to_emai_a6e2b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailmessage',
+            index=models.Index(fields=['created_by', 'template_prefix', 'to_email', 'sent_at'], name='email_email_created_e0042c_idx'),
+        ),
+    ]
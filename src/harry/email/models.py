@@ -7,9 +7,17 @@ from django.utils import timezone
 from . import constants
 
 
+class EmailMessageQuerySet(models.QuerySet):
+    def with_attachments(self) -> "EmailMessageQuerySet":
+        """Prefetch attachments in one query, e.g. when sending a batch of EmailMessages."""
+        return self.prefetch_related("attachments")
+
+
 class EmailMessage(models.Model):
     """Keep a record of every email sent in the DB."""
 
+    objects = EmailMessageQuerySet.as_manager()
+
     uuid = models.UUIDField(
         default=uuid.uuid4,
         editable=False,
@@ -67,6 +75,18 @@ class EmailMessage(models.Model):
     )
     error_message = models.TextField(blank=True)
 
+    class Meta:
+        # Serve the cooldown lookups in email_message_check_cooling_down, which
+        # range-scan sent_at within whichever scopes are enabled. The four-column
+        # index matches the default scopes exactly.
+        indexes = [
+            models.Index(fields=["sent_at"]),
+            models.Index(fields=["to_email", "template_prefix", "sent_at"]),
+            models.Index(
+                fields=["created_by", "template_prefix", "to_email", "sent_at"]
+            ),
+        ]
+
     def __str__(self) -> str:
         # This will return something like 'reset-password' since its the last part of the template prefix
         template_prefix = self.template_prefix.split("/")[-1]
@@ -1,18 +1,30 @@
+import copy
+import functools
 import logging
 import mimetypes
-from datetime import timedelta
-from typing import IO, AnyStr, List
+import os
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import IO, Any, AnyStr, List
 from uuid import uuid4
 
 from django.conf import settings
 from django.core.files import File
 from django.core.files.base import ContentFile
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.message import EmailMultiAlternatives, sanitize_address
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
 from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string
 from django.utils import timezone
 
 from anymail.signals import AnymailTrackingEvent
+from django_tasks import task
 
 from . import constants
 from .models import EmailMessage, EmailMessageAttachment
@@ -21,16 +33,51 @@ from .utils import trim_string
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _site_template_context() -> Mapping[str, Any]:
+    """Template context defaults from SITE_CONFIG, read from settings once."""
+    site_config = settings.SITE_CONFIG
+    return MappingProxyType(
+        {
+            "logo_url": site_config["logo_url"],
+            "logo_url_link": site_config["logo_url_link"],
+            "contact_email": site_config["contact_email"],
+            "site_name": site_config["name"],
+            "company": site_config["company"],
+            "company_address": site_config["company_address"],
+            "company_city_state_zip": site_config["company_city_state_zip"],
+        }
+    )
+
+
+@receiver(setting_changed)
+def _site_template_context_reset(*, setting: str, **kwargs) -> None:
+    if setting == "SITE_CONFIG":
+        _site_template_context.cache_clear()
+
+
+@functools.lru_cache(maxsize=1024)
+def _sanitize_address(name: str, email: str, encoding: str) -> str:
+    """sanitize_address() for sender and reply-to addresses, which are nearly always
+    the same handful of site-wide values. Recipients are not cached."""
+    return sanitize_address((name, email), encoding)
+
+
 def email_message_check_cooling_down(
-    *, email_message: EmailMessage, period: int, allowed: int, scopes: List[str]
+    *,
+    email_message: EmailMessage,
+    period: int,
+    allowed: int,
+    scopes: List[str],
+    now: datetime | None = None,
 ) -> bool:
     """Check that this created_by/template_prefix/to_email combination hasn't been recently sent.
     You can tighten the suppression by removing scopes. An empty list will cancel if any email
-    at all has been sent in the cooldown period."""
+    at all has been sent in the cooldown period. now defaults to timezone.now()."""
     e = email_message
     cooldown_period = timedelta(seconds=period)
     email_messages = EmailMessage.objects.filter(
-        sent_at__gt=timezone.now() - cooldown_period
+        sent_at__gt=(now or timezone.now()) - cooldown_period
     )
     if "created_by" in scopes:
         email_messages = email_messages.filter(created_by=e.created_by)
@@ -39,7 +86,11 @@ def email_message_check_cooling_down(
     if "to" in scopes:
         email_messages = email_messages.filter(to_email=e.to_email)
 
-    return email_messages.count() >= allowed
+    if allowed == 1:
+        # The common case only needs to know whether any row matches.
+        return email_messages.exists()
+    # Stop counting once the limit is reached rather than counting every match.
+    return email_messages.values("pk")[:allowed].count() >= allowed
 
 
 def email_message_prepare(*, email_message: EmailMessage) -> None:
@@ -62,8 +113,6 @@ def email_message_prepare(*, email_message: EmailMessage) -> None:
     e.reply_to_name = trim_string(field=e.reply_to_name or "")
     e.to_name = trim_string(field=e.to_name)
     e.to_email = trim_string(field=e.to_email)
-    e.full_clean()
-    e.save()
 
     if e.reply_to_name and not e.reply_to_email:
         email_message.status = constants.EmailMessage.Status.ERROR
@@ -72,15 +121,7 @@ def email_message_prepare(*, email_message: EmailMessage) -> None:
         raise RuntimeError("Reply to has a name but does not have an email")
 
     # Set defaults for template context if not provided.
-    template_context = {
-        "logo_url": settings.SITE_CONFIG["logo_url"],
-        "logo_url_link": settings.SITE_CONFIG["logo_url_link"],
-        "contact_email": settings.SITE_CONFIG["contact_email"],
-        "site_name": settings.SITE_CONFIG["name"],
-        "company": settings.SITE_CONFIG["company"],
-        "company_address": settings.SITE_CONFIG["company_address"],
-        "company_city_state_zip": settings.SITE_CONFIG["company_city_state_zip"],
-    } | e.template_context
+    template_context = _site_template_context() | e.template_context
 
     # Render subject from template if not already set
     subject = e.subject
@@ -100,6 +141,27 @@ def email_message_prepare(*, email_message: EmailMessage) -> None:
     e.save()
 
 
+def _email_message_attachment_fields(
+    *, file: IO[Any] | str | bytes, filename: str, mimetype: str
+) -> dict[str, Any]:
+    """Validate an attachment and wrap its content in a uniquely named Django file."""
+    # Filename's extension must match mimetype
+    expected = mimetypes.guess_type(filename)[0]
+    if mimetype != expected:
+        raise ValueError(f"Filename {filename} does not match mimetype {mimetype}")
+
+    ext = mimetypes.guess_extension(mimetype)  # For storage on S3
+    uuid = uuid4()
+
+    django_file: File
+    if not isinstance(file, (str, bytes)):
+        django_file = File(file, name=f"{uuid}{ext}")
+    else:
+        django_file = ContentFile(file, name=f"{uuid}{ext}")
+
+    return dict(uuid=uuid, filename=filename, mimetype=mimetype, file=django_file)
+
+
 def email_message_attach(
     *,
     email_message: EmailMessage,
@@ -116,36 +178,130 @@ def email_message_attach(
             f"EmailMessage.id={email_message.id} email_message_attach called on an email that is not status=READY. Did you run email_message_prepare()?"
         )
 
-    # Filename's extension must match mimetype
-    expected = mimetypes.guess_type(filename)[0]
-    if mimetype != expected:
-        raise ValueError(f"Filename {filename} does not match mimetype {mimetype}")
-
-    ext = mimetypes.guess_extension(mimetype)  # For storage on S3
-    uuid = uuid4()
-
-    if not isinstance(file, (str, bytes)):
-        django_file = File(file, name=f"{uuid}{ext}")
-    else:
-        django_file = ContentFile(file, name=f"{uuid}{ext}")
-
     attachment = email_message_attachment_create(
-        uuid=uuid,
         email_message=email_message,
-        filename=filename,
-        mimetype=mimetype,
-        file=django_file,
+        **_email_message_attachment_fields(
+            file=file, filename=filename, mimetype=mimetype
+        ),
     )
     return attachment
 
 
+def email_message_attach_many(
+    *,
+    email_message: EmailMessage,
+    files: list[tuple[IO[Any] | str | bytes, str, str]],
+    batch_size: int | None = None,
+) -> list[EmailMessageAttachment]:
+    """Attach several files at once, as (file, filename, mimetype) tuples that are
+    validated like email_message_attach. The rows are inserted with one bulk_create;
+    each file is still written to storage individually."""
+
+    if email_message.status != constants.EmailMessage.Status.READY:
+        raise RuntimeError(
+            f"EmailMessage.id={email_message.id} email_message_attach_many called on an email that is not status=READY. Did you run email_message_prepare()?"
+        )
+
+    # Validate everything before any file reaches storage.
+    fields = [
+        _email_message_attachment_fields(
+            file=file, filename=filename, mimetype=mimetype
+        )
+        for file, filename, mimetype in files
+    ]
+    # bulk_create skips the order_with_respect_to bookkeeping that save() does.
+    first = email_message.attachments.count()
+    attachments = [
+        EmailMessageAttachment(email_message=email_message, _order=order, **f)
+        for order, f in enumerate(fields, start=first)
+    ]
+    return EmailMessageAttachment.objects.bulk_create(
+        attachments, batch_size=batch_size
+    )
+
+
 def email_message_queue(
     *,
     email_message: EmailMessage,
     cooldown_period: int = 180,
     cooldown_allowed: int = 1,
     scopes: List[str] = ["created_by", "template_prefix", "to"],
+    now: datetime | None = None,
+) -> bool:
+    if _email_message_queue_prepare(
+        email_message=email_message,
+        cooldown_period=cooldown_period,
+        cooldown_allowed=cooldown_allowed,
+        scopes=scopes,
+        now=now,
+    ):
+        # A worker could otherwise pick the task up before the caller's transaction
+        # commits and find the message missing or not yet READY.
+        transaction.on_commit(
+            functools.partial(
+                email_message_send_task.enqueue, email_message_id=email_message.id
+            )
+        )
+        return True
+    return False
+
+
+def email_message_queue_bulk(
+    *,
+    email_messages: list[EmailMessage],
+    cooldown_period: int = 180,
+    cooldown_allowed: int = 1,
+    scopes: List[str] = ["created_by", "template_prefix", "to"],
+    now: datetime | None = None,
+) -> list[bool]:
+    """email_message_queue for many messages at once. Each message is prepared and
+    cooldown-checked as usual, then everything that passed is sent by a single task
+    over one email backend connection. Returns whether each message was queued.
+
+    A message that fails to prepare is logged and reported as not queued rather than
+    raising, so one bad message doesn't hold back the rest of the batch.
+
+    Cooldown only considers messages already sent, so duplicates within the same
+    call are not suppressed against each other."""
+    queued = []
+    for email_message in email_messages:
+        try:
+            ok = _email_message_queue_prepare(
+                email_message=email_message,
+                cooldown_period=cooldown_period,
+                cooldown_allowed=cooldown_allowed,
+                scopes=scopes,
+                now=now,
+            )
+        except Exception:
+            logger.exception(
+                f"EmailMessage.id={email_message.id} could not be prepared in email_message_queue_bulk"
+            )
+            ok = False
+        queued.append(ok)
+    email_message_ids = [
+        email_message.id for email_message, ok in zip(email_messages, queued) if ok
+    ]
+    if email_message_ids:
+        transaction.on_commit(
+            functools.partial(
+                email_message_send_batch_task.enqueue,
+                email_message_ids=email_message_ids,
+            )
+        )
+    return queued
+
+
+def _email_message_queue_prepare(
+    *,
+    email_message: EmailMessage,
+    cooldown_period: int,
+    cooldown_allowed: int,
+    scopes: List[str],
+    now: datetime | None,
 ) -> bool:
+    """Prepare an email_message for sending, or cancel it if it is cooling down.
+    Returns whether it should be sent."""
     e = email_message
 
     # If we've pre-prepared the email, skip the prepare step.
@@ -157,27 +313,28 @@ def email_message_queue(
         period=cooldown_period,
         allowed=cooldown_allowed,
         scopes=scopes,
+        now=now,
     ):
         e.status = constants.EmailMessage.Status.CANCELED
         e.error_message = "Cooling down"
-        e.full_clean()
-        e.save()
+        e.save(update_fields=["status", "error_message", "updated_at"])
         return False
-    else:
-        # Use Django tasks or celery (#3)
-        email_message_send(email_message=email_message)
-        return True
+    return True
 
 
-def email_message_send(*, email_message: EmailMessage) -> None:
-    """Send an email_message immediately. Normally called by a celery task."""
+def email_message_send(
+    *, email_message: EmailMessage, connection: BaseEmailBackend | None = None
+) -> None:
+    """Send an email_message immediately. Normally called by email_message_send_task.
+    Pass an open connection to reuse it across several sends."""
     if email_message.status != constants.EmailMessage.Status.READY:
         raise RuntimeError(
             f"EmailMessage.id={email_message.id} email_message_send called on an email that is not status=READY. Did you run email_message_queue()"
         )
+    # Status transitions below only touch columns this function sets itself, so
+    # they skip full_clean() and write just those columns.
     email_message.status = constants.EmailMessage.Status.PENDING
-    email_message.full_clean()
-    email_message.save()
+    email_message.save(update_fields=["status", "updated_at"])
     template_name = email_message.template_prefix + "_message.txt"
     html_template_name = email_message.template_prefix + "_message.html"
 
@@ -198,8 +355,8 @@ def email_message_send(*, email_message: EmailMessage) -> None:
             )
 
         encoding = settings.DEFAULT_CHARSET
-        from_email = sanitize_address(
-            (email_message.sender_name, email_message.sender_email), encoding
+        from_email = _sanitize_address(
+            email_message.sender_name, email_message.sender_email, encoding
         )
         to = [
             sanitize_address((email_message.to_name, email_message.to_email), encoding),
@@ -207,9 +364,8 @@ def email_message_send(*, email_message: EmailMessage) -> None:
 
         if email_message.reply_to_email:
             reply_to = [
-                sanitize_address(
-                    (email_message.reply_to_name, email_message.reply_to_email),
-                    encoding,
+                _sanitize_address(
+                    email_message.reply_to_name, email_message.reply_to_email, encoding
                 )
             ]
         else:
@@ -221,13 +377,18 @@ def email_message_send(*, email_message: EmailMessage) -> None:
             to=to,
             body=msg,
             reply_to=reply_to,
+            connection=connection,
         )
         if html_msg:
             django_email_message.attach_alternative(html_msg, "text/html")
 
+        # The MIME message needs each payload in memory, but the storage handle
+        # (possibly a remote download stream) is released as soon as it's read.
         for attachment in email_message.attachments.all():
+            with attachment.file.open("rb") as f:
+                content = f.read()
             django_email_message.attach(
-                attachment.filename, attachment.file.read(), attachment.mimetype
+                attachment.filename, content, attachment.mimetype
             )
 
         # See #2
@@ -241,16 +402,83 @@ def email_message_send(*, email_message: EmailMessage) -> None:
     except Exception as e:
         email_message.status = constants.EmailMessage.Status.ERROR
         email_message.error_message = repr(e)
-        email_message.full_clean()
-        email_message.save()
+        email_message.save(update_fields=["status", "error_message", "updated_at"])
         logger.exception(
             f"EmailMessage.id={email_message.id} Exception caught in send_email_message"
         )
     else:
         email_message.status = constants.EmailMessage.Status.ACCEPTED
         email_message.sent_at = timezone.now()
-        email_message.full_clean()
-        email_message.save()
+        email_message.save(
+            update_fields=["status", "message_id", "sent_at", "updated_at"]
+        )
+
+
+def email_message_send_batch(*, email_messages: list[EmailMessage]) -> None:
+    """Send several READY email_messages over a single email backend connection.
+    Each one succeeds or fails on its own, exactly as with email_message_send."""
+    for email_message in email_messages:
+        if email_message.status != constants.EmailMessage.Status.READY:
+            raise RuntimeError(
+                f"EmailMessage.id={email_message.id} email_message_send_batch called on an email that is not status=READY. Did you run email_message_prepare()?"
+            )
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing was sent, so every message fails the same way email_message_send
+        # would have failed it.
+        for email_message in email_messages:
+            email_message.status = constants.EmailMessage.Status.ERROR
+            email_message.error_message = repr(e)
+            email_message.save(update_fields=["status", "error_message", "updated_at"])
+        logger.exception(
+            f"EmailMessage.ids={[m.id for m in email_messages]} could not open an email backend connection in email_message_send_batch"
+        )
+        return
+
+    try:
+        for email_message in email_messages:
+            email_message_send(email_message=email_message, connection=connection)
+    finally:
+        connection.close()
+
+
+@task()
+def email_message_send_task(email_message_id: int) -> None:
+    """email_message_send on the TASKS backend. Takes an id because task arguments
+    must be JSON-serializable."""
+    email_message = EmailMessage.objects.get(pk=email_message_id)
+    email_message_send(email_message=email_message)
+
+
+@task()
+def email_message_send_batch_task(email_message_ids: list[int]) -> None:
+    """email_message_send_batch on the TASKS backend, preserving the given order.
+    Messages that were deleted or are no longer READY by the time the task runs (for
+    example canceled, or already sent by an earlier attempt) are skipped, not sent."""
+    email_messages = (
+        EmailMessage.objects.filter(pk__in=email_message_ids)
+        .with_attachments()
+        .in_bulk()
+    )
+    ready = []
+    for pk in email_message_ids:
+        email_message = email_messages.get(pk)
+        if email_message is None:
+            logger.warning(
+                f"EmailMessage.id={pk} not found, skipping in email_message_send_batch_task"
+            )
+        elif email_message.status != constants.EmailMessage.Status.READY:
+            logger.warning(
+                f"EmailMessage.id={pk} is status={email_message.status}, not READY, skipping in email_message_send_batch_task"
+            )
+        else:
+            ready.append(email_message)
+
+    if ready:
+        email_message_send_batch(email_messages=ready)
 
 
 def email_message_create(*, save: bool = False, **kwargs) -> EmailMessage:
@@ -265,7 +493,14 @@ def email_message_create(*, save: bool = False, **kwargs) -> EmailMessage:
 
 def email_message_duplicate(*, original: EmailMessage) -> EmailMessage:
     """Duplicate an EmailMessage and return the new EmailMessage."""
-    duplicate = EmailMessage.objects.get(pk=original.pk)
+    deferred_fields = original.get_deferred_fields()
+    if deferred_fields:
+        # The copy has no pk to lazily load these from once it is reset below.
+        original.refresh_from_db(fields=deferred_fields)
+    duplicate = copy.copy(original)
+    # A shallow copy shares the original's prefetch cache, which would hand back the
+    # original's attachments for the duplicate.
+    duplicate.__dict__.pop("_prefetched_objects_cache", None)
 
     duplicate.pk = None
     duplicate.uuid = uuid4()
@@ -275,18 +510,33 @@ def email_message_duplicate(*, original: EmailMessage) -> EmailMessage:
     duplicate.error_message = ""
     duplicate.message_id = None
     duplicate.sent_at = None
-    duplicate.full_clean()
-    duplicate.save()
 
+    # Persists the duplicate as READY.
     email_message_prepare(email_message=duplicate)
 
-    for attachment in original.attachments.all():
-        email_message_attach(
-            email_message=duplicate,
-            file=attachment.file,
-            filename=attachment.filename,
-            mimetype=attachment.mimetype,
-        )
+    # The original attachments were validated when they were attached, so copy them
+    # as-is under fresh storage names and insert them in one query.
+    originals = list(original.attachments.all())
+    attachments = []
+    try:
+        for order, attachment in enumerate(originals):
+            uuid = uuid4()
+            ext = os.path.splitext(attachment.file.name)[1]
+            attachments.append(
+                EmailMessageAttachment(
+                    uuid=uuid,
+                    email_message=duplicate,
+                    filename=attachment.filename,
+                    mimetype=attachment.mimetype,
+                    file=File(attachment.file, name=f"{uuid}{ext}"),
+                    _order=order,
+                )
+            )
+        EmailMessageAttachment.objects.bulk_create(attachments)
+    finally:
+        # Saving the copies opened each original's storage handle.
+        for attachment in originals:
+            attachment.file.close()
 
     return duplicate
 
@@ -312,8 +562,14 @@ def email_message_webhook_process(*, event: AnymailTrackingEvent) -> None:
             )
             return
 
-        email_message = EmailMessage.objects.filter(message_id=event.message_id).first()
-        if not email_message:
+        # Only what's logged below; the update itself is a queryset UPDATE, so the
+        # template_context and esp_event JSON never need to be loaded. message_id is
+        # unique, so get() is a single unique-index probe with no ORDER BY.
+        try:
+            email_message = EmailMessage.objects.only(
+                "id", "status", "esp_event_at"
+            ).get(message_id=event.message_id)
+        except EmailMessage.DoesNotExist:
             logger.warning(
                 "No EmailMessage found for message_id=%s, skipping: event_type=%s event_id=%s",
                 event.message_id,
@@ -329,8 +585,30 @@ def email_message_webhook_process(*, event: AnymailTrackingEvent) -> None:
             event.message_id,
         )
 
+        old_status = email_message.status
+        status = constants.EmailMessage.STATUS_BY_EVENT_TYPE.get(
+            event.event_type, constants.EmailMessage.Status.UNKNOWN
+        )
+
         # Make sure this is the most recent webhook, in case it arrived out of order.
-        if email_message.esp_event_at and email_message.esp_event_at > event.timestamp:
+        # The comparison lives in the UPDATE itself so that two webhooks for the same
+        # message racing each other can't both pass a read-then-write check.
+        # Some ESPs send events without a timestamp; those can't be ordered, so they
+        # only apply while nothing has been recorded yet.
+        is_current = Q(esp_event_at__isnull=True)
+        if event.timestamp is not None:
+            is_current |= Q(esp_event_at__lte=event.timestamp)
+        updated = (
+            EmailMessage.objects.filter(pk=email_message.pk)
+            .filter(is_current)
+            .update(
+                status=status,
+                esp_event=event.esp_event,
+                esp_event_at=event.timestamp,
+                updated_at=timezone.now(),
+            )
+        )
+        if not updated:
             logger.warning(
                 "Stale webhook ignored: EmailMessage.id=%s has esp_event_at=%s but event timestamp=%s, event_type=%s event_id=%s esp_event=%s",
                 email_message.id,
@@ -342,18 +620,6 @@ def email_message_webhook_process(*, event: AnymailTrackingEvent) -> None:
             )
             return
 
-        old_status = email_message.status
-        valid_statuses = {choice.value for choice in constants.EmailMessage.Status}
-        status = (
-            event.event_type
-            if event.event_type in valid_statuses
-            else constants.EmailMessage.Status.UNKNOWN
-        )
-        email_message.status = status
-        email_message.esp_event = event.esp_event
-        email_message.esp_event_at = event.timestamp
-        email_message.full_clean()
-        email_message.save()
         logger.info(
             "EmailMessage.id=%s status updated: %s -> %s (event_id=%s)",
             email_message.id,
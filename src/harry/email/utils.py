@@ -1,35 +1,33 @@
 import json
+import re
+
+_WHITESPACE = re.compile(r"\s+")
 
 
 def trim_string(field: str) -> str:
     """Remove superfluous linebreaks and whitespace"""
-    lines = field.splitlines()
-    sanitized_lines = []
-    for line in lines:
-        sanitized_line = line.strip()
-        if sanitized_line:  # Remove blank lines
-            sanitized_lines.append(line.strip())
-    sanitized = " ".join(sanitized_lines).strip()
-    return sanitized
+    field = field.strip()
+    # Most fields are a single clean line. isprintable() is False for every whitespace
+    # character except " ", so such fields have nothing left to collapse.
+    if field.isprintable() and "  " not in field:
+        return field
+    return _WHITESPACE.sub(" ", field)
 
 
 def validate_request_body_json(
-    *, body: str, required_keys: list | None = None
+    *, body: str | bytes, required_keys: list | None = None
 ) -> list | dict:
-    """Validate that the request body is JSON and return the parsed JSON."""
+    """Validate that the request body is JSON and return the parsed JSON.
+    body may be request.body as-is; bytes are parsed without decoding them first."""
     try:
         body_json = json.loads(body)
-    except json.decoder.JSONDecodeError:
+    except ValueError:  # JSONDecodeError, or UnicodeDecodeError for bytes
         raise ValueError("Invalid payload")
 
     # Ensure all required keys
-    if required_keys is None:
-        required_keys = []
-
-    for key in required_keys:
-        try:
-            body_json[key]
-        except KeyError:
-            raise ValueError("Invalid payload")
+    if required_keys and not (
+        isinstance(body_json, dict) and body_json.keys() >= set(required_keys)
+    ):
+        raise ValueError("Invalid payload")
 
     return body_json
@@ -1,14 +1,20 @@
 import tempfile
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 from anymail.signals import AnymailTrackingEvent
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from freezegun import freeze_time
+from django_tasks import default_task_backend
 
 from .. import factories
 
 from harry.email import constants, services
+from harry.email.models import EmailMessage
 
 
 @pytest.fixture(autouse=True)
@@ -16,7 +22,7 @@ def anymail_backend(settings):
     settings.EMAIL_BACKEND = "anymail.backends.test.EmailBackend"
 
 
-def test_send_email(user, mailoutbox, settings):
+def test_send_email(user, mailoutbox, settings, django_capture_on_commit_callbacks):
     """Create and send an EmailMessage"""
     email_message = services.email_message_create(
         created_by=user,
@@ -31,8 +37,9 @@ def test_send_email(user, mailoutbox, settings):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert len(mailoutbox) == 1
     assert mailoutbox[0].subject == "A subject"
@@ -44,6 +51,42 @@ def test_send_email(user, mailoutbox, settings):
     assert mailoutbox[0].reply_to == []
 
 
+def test_queue_enqueues_send_task(
+    user, mailoutbox, settings, django_capture_on_commit_callbacks
+):
+    """Queueing hands the send to the TASKS backend once the transaction commits, rather than sending inline"""
+    settings.TASKS = {
+        "default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}
+    }
+    email_message = services.email_message_create(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+    )
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        assert services.email_message_queue(email_message=email_message) is True
+    # Nothing is enqueued until the surrounding transaction commits.
+    assert len(default_task_backend.results) == 0
+    (callback,) = callbacks
+    callback()
+    assert len(mailoutbox) == 0
+    email_message.refresh_from_db(fields=["status"])
+    assert email_message.status == constants.EmailMessage.Status.READY
+
+    (result,) = default_task_backend.results
+    assert result.task.func is services.email_message_send_task.func
+    assert result.kwargs == {"email_message_id": email_message.id}
+
+    # What the worker would do
+    services.email_message_send_task.call(*result.args, **result.kwargs)
+    email_message.refresh_from_db(fields=["status"])
+    assert email_message.status == constants.EmailMessage.Status.ACCEPTED
+    assert len(mailoutbox) == 1
+
+
 @pytest.mark.parametrize(
     "name,email,expected",
     [
@@ -51,7 +94,9 @@ def test_send_email(user, mailoutbox, settings):
         (" ", " bob@example.com", "bob@example.com"),
     ],
 )
-def test_send_email_sanitize(user, name, email, expected, mailoutbox):
+def test_send_email_sanitize(
+    user, name, email, expected, mailoutbox, django_capture_on_commit_callbacks
+):
     """Sending an email properly sanitizes the addresses"""
     email_message = services.email_message_create(
         created_by=user,
@@ -70,8 +115,9 @@ def test_send_email_sanitize(user, name, email, expected, mailoutbox):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert len(mailoutbox) == 1
     assert mailoutbox[0].subject == "A subject"
@@ -80,7 +126,7 @@ def test_send_email_sanitize(user, name, email, expected, mailoutbox):
     assert mailoutbox[0].reply_to == [expected]
 
 
-def test_subject_newlines(user, mailoutbox):
+def test_subject_newlines(user, mailoutbox, django_capture_on_commit_callbacks):
     """Subject newlines should be collapsed"""
     email_message = services.email_message_create(
         created_by=user,
@@ -97,13 +143,13 @@ def test_subject_newlines(user, mailoutbox):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
     assert len(mailoutbox) == 1
     assert mailoutbox[0].subject == "A subject Exciting!"
 
 
-def test_subject_limit(user, mailoutbox, settings):
+def test_subject_limit(user, mailoutbox, settings, django_capture_on_commit_callbacks):
     """Truncate subject lines of more than 78 characters"""
     subject = factories.fake.pystr(min_chars=100, max_chars=100)
     expected = subject[: settings.MAX_SUBJECT_LENGTH - 3] + "..."
@@ -120,14 +166,35 @@ def test_subject_limit(user, mailoutbox, settings):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
     assert len(mailoutbox) == 1
     assert expected == mailoutbox[0].subject
     assert len(expected) == settings.MAX_SUBJECT_LENGTH
 
 
-def test_email_attachment(user, mailoutbox):
+def test_site_config_template_context(user, settings):
+    """SITE_CONFIG provides template context defaults and picks up settings changes"""
+    email_message_args = dict(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+        template_context={"company": "Overridden Co"},
+    )
+    email_message = services.email_message_create(**email_message_args)
+    services.email_message_prepare(email_message=email_message)
+    assert email_message.template_context["site_name"] == "Example App"
+    assert email_message.template_context["company"] == "Overridden Co"
+
+    settings.SITE_CONFIG = settings.SITE_CONFIG | {"name": "Renamed App"}
+    email_message = services.email_message_create(**email_message_args)
+    services.email_message_prepare(email_message=email_message)
+    assert email_message.template_context["site_name"] == "Renamed App"
+
+
+def test_email_attachment(user, mailoutbox, django_capture_on_commit_callbacks):
     """Emails can have attachments created from other files or byte content"""
     email_message = services.email_message_create(
         created_by=user,
@@ -145,8 +212,8 @@ def test_email_attachment(user, mailoutbox):
 
     # Attachment 1 - from file
     filename_1 = factories.fake.file_name(extension="pdf")
-    file_1 = tempfile.TemporaryFile(mode="w+b")
-    file_1.write(factories.fake.binary())
+    file_1 = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024, mode="w+b")
+    file_1.write(factories.fake.binary(length=1024))
     email_message_attachment_1 = services.email_message_attach(
         email_message=email_message,
         file=file_1,
@@ -156,7 +223,7 @@ def test_email_attachment(user, mailoutbox):
 
     # Attachment 2 - from content
     filename_2 = factories.fake.file_name(extension="png")
-    content_2 = factories.fake.binary()
+    content_2 = factories.fake.binary(length=1024)
     email_message_attachment_2 = services.email_message_attach(
         email_message=email_message,
         file=content_2,
@@ -164,8 +231,9 @@ def test_email_attachment(user, mailoutbox):
         mimetype="image/png",
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert email_message.attachments.count() == 2
     assert len(mailoutbox) == 1
@@ -187,6 +255,51 @@ def test_email_attachment(user, mailoutbox):
     assert mailoutbox[0].attachments[1][2] == "image/png"
 
 
+def test_email_attach_many(user, mailoutbox, django_capture_on_commit_callbacks):
+    """Many attachments can be created in one bulk insert, preserving their order"""
+    email_message = services.email_message_create(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+        template_context={
+            "user_name": user.first_name,
+            "user_email": user.email,
+            "password_reset_url": "",
+        },
+    )
+    services.email_message_prepare(email_message=email_message)
+    services.email_message_attach(
+        email_message=email_message,
+        file=b"first",
+        filename="first.txt",
+        mimetype="text/plain",
+    )
+
+    files = [
+        (factories.fake.binary(length=64), f"{i}.pdf", "application/pdf")
+        for i in range(50)
+    ]
+    with CaptureQueriesContext(connection) as ctx:
+        attachments = services.email_message_attach_many(
+            email_message=email_message, files=files, batch_size=20
+        )
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 3
+    assert len(attachments) == 50
+
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    assert email_message.attachments.count() == 51
+    assert len(mailoutbox) == 1
+    assert mailoutbox[0].attachments[0][0] == "first.txt"
+    for sent, (content, filename, mimetype) in zip(
+        mailoutbox[0].attachments[1:], files
+    ):
+        assert sent == (filename, content, mimetype)
+
+
 def test_email_attachment_matching_mime(user):
     """An EmailMessageAttachment's extension must match its mimetype"""
     email_message = services.email_message_create(
@@ -206,13 +319,85 @@ def test_email_attachment_matching_mime(user):
     with pytest.raises(ValueError, match="does not match mimetype"):
         services.email_message_attach(
             email_message=email_message,
-            file=factories.fake.binary(),
+            file=factories.fake.binary(length=1024),
             filename=factories.fake.file_name(extension="pdf"),
             mimetype="application/json",
         )
 
 
-def test_cooldown(user, mailoutbox):
+def test_duplicate_email_message(user):
+    """Duplicating an EmailMessage yields a new READY EmailMessage with its attachments copied"""
+    email_message = services.email_message_create(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+        template_context={
+            "user_name": user.first_name,
+            "user_email": user.email,
+            "password_reset_url": "",
+        },
+    )
+    services.email_message_prepare(email_message=email_message)
+    content = factories.fake.binary(length=1024)
+    attachment = services.email_message_attach(
+        email_message=email_message,
+        file=content,
+        filename=factories.fake.file_name(extension="pdf"),
+        mimetype="application/pdf",
+    )
+
+    duplicate = services.email_message_duplicate(original=email_message)
+
+    assert duplicate.pk != email_message.pk
+    assert duplicate.uuid != email_message.uuid
+    assert duplicate.status == constants.EmailMessage.Status.READY
+    assert duplicate.subject == email_message.subject
+    assert email_message.attachments.count() == 1
+    assert duplicate.attachments.count() == 1
+    duplicate_attachment = duplicate.attachments.get()
+    assert duplicate_attachment.uuid != attachment.uuid
+    assert duplicate_attachment.filename == attachment.filename
+    assert duplicate_attachment.mimetype == attachment.mimetype
+    assert duplicate_attachment.file.name != attachment.file.name
+    assert duplicate_attachment.file.read() == content
+
+
+def test_duplicate_email_message_deferred_fields(user):
+    """An original loaded with deferred fields duplicates in full, and its attachment files are closed afterwards"""
+    email_message = services.email_message_create(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+    )
+    services.email_message_prepare(email_message=email_message)
+    services.email_message_attach(
+        email_message=email_message,
+        file=factories.fake.binary(length=1024),
+        filename=factories.fake.file_name(extension="pdf"),
+        mimetype="application/pdf",
+    )
+    original = (
+        EmailMessage.objects.only("id", "status")
+        .with_attachments()
+        .get(pk=email_message.pk)
+    )
+
+    with mock.patch.object(FieldFile, "close", autospec=True) as close:
+        duplicate = services.email_message_duplicate(original=original)
+
+    assert duplicate.pk != email_message.pk
+    assert duplicate.subject == "A subject"
+    assert duplicate.to_email == user.email
+    assert duplicate.template_prefix == "example"
+    assert duplicate.attachments.count() == 1
+    close.assert_called_once_with(original.attachments.all()[0].file)
+
+
+def test_cooldown(user, mailoutbox, django_capture_on_commit_callbacks):
     """A created_by/template_prefix/to_email combination has a cooldown period"""
     email_message_args = dict(
         created_by=user,
@@ -229,37 +414,84 @@ def test_cooldown(user, mailoutbox):
 
     # Send the first email
     email_message = services.email_message_create(**email_message_args)
-    assert services.email_message_queue(email_message=email_message) is True
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.email_message_queue(email_message=email_message) is True
     assert len(mailoutbox) == 1
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
 
     # Send an email with a different recipient
     email_message = services.email_message_create(
         **{**email_message_args, "to_email": "someone.else@example.com"}
     )
-    assert services.email_message_queue(email_message=email_message) is True
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.email_message_queue(email_message=email_message) is True
     assert len(mailoutbox) == 2
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
 
     # Cancel the third email that is identical to the first
     email_message = services.email_message_create(**email_message_args)
-    assert services.email_message_queue(email_message=email_message) is False
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.email_message_queue(email_message=email_message) is False
     assert len(mailoutbox) == 2
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.CANCELED
 
     # Send identical email if it is 181 seconds in the future
-    with freeze_time(timezone.now() + timedelta(seconds=181)):
+    email_message = services.email_message_create(**email_message_args)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert (
+            services.email_message_queue(
+                email_message=email_message, now=timezone.now() + timedelta(seconds=181)
+            )
+            is True
+        )
+    assert len(mailoutbox) == 3
+    email_message.refresh_from_db(fields=["status"])
+    assert email_message.status == constants.EmailMessage.Status.ACCEPTED
+
+
+def test_cooldown_allowed(user, mailoutbox, django_capture_on_commit_callbacks):
+    """cooldown_allowed permits that many sends within the cooldown period"""
+    email_message_args = dict(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email=user.email,
+        template_context={
+            "user_name": user.first_name,
+            "user_email": user.email,
+            "password_reset_url": "",
+        },
+    )
+
+    for _ in range(2):
         email_message = services.email_message_create(**email_message_args)
-        assert services.email_message_queue(email_message=email_message) is True
-        assert len(mailoutbox) == 3
-        email_message.refresh_from_db()
-        assert email_message.status == constants.EmailMessage.Status.ACCEPTED
+        with django_capture_on_commit_callbacks(execute=True):
+            assert (
+                services.email_message_queue(
+                    email_message=email_message, cooldown_allowed=2
+                )
+                is True
+            )
+    assert len(mailoutbox) == 2
+
+    email_message = services.email_message_create(**email_message_args)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert (
+            services.email_message_queue(
+                email_message=email_message, cooldown_allowed=2
+            )
+            is False
+        )
+    assert len(mailoutbox) == 2
+    email_message.refresh_from_db(fields=["status"])
+    assert email_message.status == constants.EmailMessage.Status.CANCELED
 
 
-def test_cooldown_scopes(user, mailoutbox):
+def test_cooldown_scopes(user, mailoutbox, django_capture_on_commit_callbacks):
     """Email cancellation can be tightened by removing scopes"""
     email_message_args = dict(
         created_by=user,
@@ -276,56 +508,62 @@ def test_cooldown_scopes(user, mailoutbox):
 
     # Send the first email
     email_message = services.email_message_create(**email_message_args)
-    assert services.email_message_queue(email_message=email_message) is True
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.email_message_queue(email_message=email_message) is True
     assert len(mailoutbox) == 1
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
 
     # Email with different recipient cancels if "to" scope is removed
     email_message = services.email_message_create(
         **{**email_message_args, "to_email": "someone.else@example.com"}
     )
-    assert (
-        services.email_message_queue(
-            email_message=email_message, scopes=["created_by", "template_prefix"]
+    with django_capture_on_commit_callbacks(execute=True):
+        assert (
+            services.email_message_queue(
+                email_message=email_message, scopes=["created_by", "template_prefix"]
+            )
+            is False
         )
-        is False
-    )
     assert len(mailoutbox) == 1
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.CANCELED
 
     # Email with different user cancels if "created_by" scope is removed
     email_message = services.email_message_create(
         **{**email_message_args, "created_by": factories.user_create()}
     )
-    assert (
-        services.email_message_queue(
-            email_message=email_message, scopes=["template_prefix", "to"]
+    with django_capture_on_commit_callbacks(execute=True):
+        assert (
+            services.email_message_queue(
+                email_message=email_message, scopes=["template_prefix", "to"]
+            )
+            is False
         )
-        is False
-    )
     assert len(mailoutbox) == 1
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.CANCELED
 
     # Email with different template cancels if "template_prefix" scope is removed
     email_message = services.email_message_create(
         **{**email_message_args, "template_prefix": "account/email/password_reset_key"}
     )
-    assert (
-        services.email_message_queue(
-            email_message=email_message, scopes=["created_by", "to"]
+    with django_capture_on_commit_callbacks(execute=True):
+        assert (
+            services.email_message_queue(
+                email_message=email_message, scopes=["created_by", "to"]
+            )
+            is False
         )
-        is False
-    )
     assert len(mailoutbox) == 1
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.CANCELED
 
 
 @pytest.mark.skip("Waiting for settings/orgs to be migrated")
-def test_disable_outbound_email_global_setting(user, mailoutbox):
+def test_disable_outbound_email_global_setting(
+    user, mailoutbox, django_capture_on_commit_callbacks
+):
     """disable_outbound_email GlobalSetting should disable all outbound emails."""
     services.global_setting_create(
         slug="disable_outbound_email", type=constants.SettingType.BOOL, value="true"
@@ -343,14 +581,15 @@ def test_disable_outbound_email_global_setting(user, mailoutbox):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status", "error_message"])
     assert email_message.status == constants.EmailMessage.Status.ERROR
     assert "GlobalSetting disable_outbound_email is True" in email_message.error_message
     assert len(mailoutbox) == 0
 
 
-def test_send_email_with_reply_to(user, mailoutbox):
+def test_send_email_with_reply_to(user, mailoutbox, django_capture_on_commit_callbacks):
     """Create and send an EmailMessage with a reply to should work"""
     email_message = services.email_message_create(
         created_by=user,
@@ -367,14 +606,237 @@ def test_send_email_with_reply_to(user, mailoutbox):
         },
     )
 
-    services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert len(mailoutbox) == 1
     assert mailoutbox[0].reply_to == ["Support <support@example.com>"]
 
 
-def test_reply_to_name_no_email(user, mailoutbox):
+def test_send_email_batch(user, mailoutbox):
+    """A batch of READY EmailMessages is sent over one backend connection"""
+    email_messages = []
+    for i in range(3):
+        email_message = services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+            template_context={
+                "user_name": user.first_name,
+                "user_email": user.email,
+                "password_reset_url": "",
+            },
+        )
+        services.email_message_prepare(email_message=email_message)
+        email_messages.append(email_message)
+
+    with mock.patch(
+        "harry.email.services.get_connection", wraps=services.get_connection
+    ) as get_connection:
+        services.email_message_send_batch(email_messages=email_messages)
+
+    get_connection.assert_called_once()
+    assert [m.subject for m in mailoutbox] == ["Subject 0", "Subject 1", "Subject 2"]
+    for email_message in email_messages:
+        email_message.refresh_from_db(fields=["status", "message_id"])
+        assert email_message.status == constants.EmailMessage.Status.ACCEPTED
+        assert email_message.message_id
+
+
+class RefusingEmailBackend(BaseEmailBackend):
+    """An email backend whose server can't be reached"""
+
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+
+def test_send_email_batch_connection_error(user, mailoutbox, settings):
+    """If the backend connection can't be opened, every message in the batch is marked ERROR"""
+    email_messages = []
+    for i in range(2):
+        email_message = services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+        )
+        services.email_message_prepare(email_message=email_message)
+        email_messages.append(email_message)
+    settings.EMAIL_BACKEND = f"{__name__}.RefusingEmailBackend"
+
+    services.email_message_send_batch(email_messages=email_messages)
+
+    assert len(mailoutbox) == 0
+    for email_message in email_messages:
+        email_message.refresh_from_db(fields=["status", "error_message"])
+        assert email_message.status == constants.EmailMessage.Status.ERROR
+        assert "ConnectionRefusedError" in email_message.error_message
+
+
+def test_send_email_batch_not_ready(user, mailoutbox):
+    """A batch containing an EmailMessage that is not READY is rejected before anything is sent"""
+    email_messages = [
+        services.email_message_create(
+            created_by=user,
+            subject="A subject",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=user.email,
+        )
+        for _ in range(2)
+    ]
+    services.email_message_prepare(email_message=email_messages[0])
+
+    with pytest.raises(RuntimeError, match="not status=READY"):
+        services.email_message_send_batch(email_messages=email_messages)
+    assert len(mailoutbox) == 0
+    email_messages[0].refresh_from_db(fields=["status"])
+    assert email_messages[0].status == constants.EmailMessage.Status.READY
+
+
+def test_queue_email_bulk(
+    user, mailoutbox, settings, django_capture_on_commit_callbacks
+):
+    """Bulk queueing runs cooldown per message and sends the rest in one task over one connection"""
+    already_sent = services.email_message_create(
+        created_by=user,
+        subject="A subject",
+        template_prefix="example",
+        to_name=user.first_name,
+        to_email="recipient0@example.com",
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        services.email_message_queue(email_message=already_sent)
+
+    email_messages = [
+        services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+        )
+        for i in range(50)
+    ]
+
+    settings.TASKS = {
+        "default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        queued = services.email_message_queue_bulk(email_messages=email_messages)
+    assert queued == [False] + [True] * 49
+    assert email_messages[0].status == constants.EmailMessage.Status.CANCELED
+    (result,) = default_task_backend.results
+    assert result.task.func is services.email_message_send_batch_task.func
+    assert result.kwargs == {"email_message_ids": [m.id for m in email_messages[1:]]}
+    assert len(mailoutbox) == 1
+
+    # What the worker would do
+    with mock.patch(
+        "harry.email.services.get_connection", wraps=services.get_connection
+    ) as get_connection:
+        services.email_message_send_batch_task.call(*result.args, **result.kwargs)
+
+    get_connection.assert_called_once()
+    assert [m.subject for m in mailoutbox[1:]] == [f"Subject {i}" for i in range(1, 50)]
+    for email_message in email_messages[1:]:
+        email_message.refresh_from_db(fields=["status"])
+        assert email_message.status == constants.EmailMessage.Status.ACCEPTED
+
+
+def test_queue_email_bulk_prepare_error(
+    user, mailoutbox, django_capture_on_commit_callbacks
+):
+    """A message that fails to prepare is reported as not queued and the rest are still sent"""
+    email_messages = [
+        services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+        )
+        for i in range(3)
+    ]
+    email_messages[2].reply_to_name = "Reply to name"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        queued = services.email_message_queue_bulk(email_messages=email_messages)
+
+    assert queued == [True, True, False]
+    assert [m.subject for m in mailoutbox] == ["Subject 0", "Subject 1"]
+    email_messages[2].refresh_from_db(fields=["status"])
+    assert email_messages[2].status == constants.EmailMessage.Status.ERROR
+
+
+def test_send_email_batch_task_skips_not_ready(user, mailoutbox):
+    """The batch task sends the READY messages and skips any that were sent, canceled or deleted meanwhile"""
+    email_messages = []
+    for i in range(4):
+        email_message = services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+        )
+        services.email_message_prepare(email_message=email_message)
+        email_messages.append(email_message)
+    email_message_ids = [m.id for m in email_messages]
+    services.email_message_send(email_message=email_messages[0])
+    email_messages[1].status = constants.EmailMessage.Status.CANCELED
+    email_messages[1].save()
+    email_messages[3].delete()
+
+    services.email_message_send_batch_task.call(email_message_ids=email_message_ids)
+
+    assert [m.subject for m in mailoutbox] == ["Subject 0", "Subject 2"]
+    email_messages[1].refresh_from_db(fields=["status"])
+    assert email_messages[1].status == constants.EmailMessage.Status.CANCELED
+    email_messages[2].refresh_from_db(fields=["status"])
+    assert email_messages[2].status == constants.EmailMessage.Status.ACCEPTED
+
+
+def test_queue_email_bulk_connection_error(
+    user, mailoutbox, settings, django_capture_on_commit_callbacks
+):
+    """If the worker can't open a backend connection, the bulk-queued messages are marked ERROR rather than left READY"""
+    email_messages = [
+        services.email_message_create(
+            created_by=user,
+            subject=f"Subject {i}",
+            template_prefix="example",
+            to_name=user.first_name,
+            to_email=f"recipient{i}@example.com",
+        )
+        for i in range(2)
+    ]
+    settings.TASKS = {
+        "default": {"BACKEND": "django_tasks.backends.dummy.DummyBackend"}
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.email_message_queue_bulk(email_messages=email_messages) == [
+            True,
+            True,
+        ]
+    (result,) = default_task_backend.results
+
+    # What the worker would do
+    settings.EMAIL_BACKEND = f"{__name__}.RefusingEmailBackend"
+    services.email_message_send_batch_task.call(*result.args, **result.kwargs)
+
+    assert len(mailoutbox) == 0
+    for email_message in email_messages:
+        email_message.refresh_from_db(fields=["status", "error_message"])
+        assert email_message.status == constants.EmailMessage.Status.ERROR
+        assert "ConnectionRefusedError" in email_message.error_message
+
+
+def test_reply_to_name_no_email(user, mailoutbox, django_capture_on_commit_callbacks):
     """Blank reply_to_email with a non-blank reply_to_name raises an error"""
     email_message = services.email_message_create(
         created_by=user,
@@ -391,8 +853,9 @@ def test_reply_to_name_no_email(user, mailoutbox):
     )
 
     with pytest.raises(RuntimeError):
-        services.email_message_queue(email_message=email_message)
-    email_message.refresh_from_db()
+        with django_capture_on_commit_callbacks(execute=True):
+            services.email_message_queue(email_message=email_message)
+    email_message.refresh_from_db(fields=["status"])
     assert email_message.status == constants.EmailMessage.Status.ERROR
     assert len(mailoutbox) == 0
 
@@ -400,7 +863,7 @@ def test_reply_to_name_no_email(user, mailoutbox):
 # --- Webhook processing tests ---
 
 
-def test_webhook_updates_status():
+def test_webhook_updates_status(django_assert_num_queries):
     """A delivered event for a known message_id updates the EmailMessage's status, esp_event, and esp_event_at fields"""
     email_message = factories.email_message_create(
         status=constants.EmailMessage.Status.ACCEPTED,
@@ -415,8 +878,10 @@ def test_webhook_updates_status():
         esp_event={"raw": "event-data"},
     )
 
-    services.email_message_webhook_process(event=event)
-    email_message.refresh_from_db()
+    # One SELECT to match the message_id, one conditional UPDATE.
+    with django_assert_num_queries(2):
+        services.email_message_webhook_process(event=event)
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
 
     assert email_message.status == constants.EmailMessage.Status.DELIVERED
     assert email_message.esp_event == {"raw": "event-data"}
@@ -439,7 +904,7 @@ def test_webhook_unknown_event_type():
     )
 
     services.email_message_webhook_process(event=event)
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
 
     assert email_message.status == constants.EmailMessage.Status.UNKNOWN
     assert email_message.esp_event == {"raw": "event-data"}
@@ -461,7 +926,7 @@ def test_webhook_no_message_id():
     )
 
     services.email_message_webhook_process(event=event)
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
 
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert email_message.esp_event == {}
@@ -483,7 +948,7 @@ def test_webhook_no_matching_email_message():
     )
 
     services.email_message_webhook_process(event=event)
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
 
     assert email_message.status == constants.EmailMessage.Status.ACCEPTED
     assert email_message.esp_event == {}
@@ -509,13 +974,51 @@ def test_webhook_stale_event_ignored():
     )
 
     services.email_message_webhook_process(event=stale_event)
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
 
     assert email_message.status == constants.EmailMessage.Status.DELIVERED
     assert email_message.esp_event == {"raw": "newer-event"}
     assert email_message.esp_event_at == now
 
 
+def test_webhook_no_timestamp():
+    """An event without a timestamp applies while no esp_event_at is recorded, and is ignored after that"""
+    email_message = factories.email_message_create(
+        status=constants.EmailMessage.Status.ACCEPTED,
+        message_id="test-message-id-123",
+    )
+
+    event = AnymailTrackingEvent(
+        event_type="delivered",
+        message_id="test-message-id-123",
+        recipient=email_message.to_email,
+        timestamp=None,
+        esp_event={"raw": "event-data"},
+    )
+    services.email_message_webhook_process(event=event)
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
+
+    assert email_message.status == constants.EmailMessage.Status.DELIVERED
+    assert email_message.esp_event == {"raw": "event-data"}
+    assert email_message.esp_event_at is None
+
+    now = timezone.now()
+    EmailMessage.objects.filter(pk=email_message.pk).update(esp_event_at=now)
+    event = AnymailTrackingEvent(
+        event_type="opened",
+        message_id="test-message-id-123",
+        recipient=email_message.to_email,
+        timestamp=None,
+        esp_event={"raw": "untimed-event"},
+    )
+    services.email_message_webhook_process(event=event)
+    email_message.refresh_from_db(fields=["status", "esp_event", "esp_event_at"])
+
+    assert email_message.status == constants.EmailMessage.Status.DELIVERED
+    assert email_message.esp_event == {"raw": "event-data"}
+    assert email_message.esp_event_at == now
+
+
 def test_webhook_signal_integration():
     """The anymail tracking signal receiver is properly registered and calls through to the service function"""
     from anymail.signals import tracking
@@ -534,6 +1037,6 @@ def test_webhook_signal_integration():
     )
 
     tracking.send(sender=object(), event=event, esp_name="TestESP")
-    email_message.refresh_from_db()
+    email_message.refresh_from_db(fields=["status"])
 
     assert email_message.status == constants.EmailMessage.Status.DELIVERED
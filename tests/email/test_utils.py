@@ -0,0 +1,61 @@
+import pytest
+
+from harry.email.utils import trim_string, validate_request_body_json
+
+
+@pytest.mark.parametrize(
+    "field,expected",
+    [
+        ("Bob Jones", "Bob Jones"),  # Already clean
+        ("  Bob Jones  ", "Bob Jones"),
+        ("Bob  Jones", "Bob Jones"),  # Runs of spaces collapse
+        ("Bob\tJones", "Bob Jones"),
+        ("Bob\xa0Jones", "Bob Jones"),
+        ("A subject\r\nExciting!", "A subject Exciting!"),
+        ("A subject\n\n\nExciting!\n", "A subject Exciting!"),  # Blank lines
+        (" \n\t ", ""),
+        ("Bob\u200bJones", "Bob\u200bJones"),  # Non-printable but not whitespace
+    ],
+)
+def test_trim_string(field, expected):
+    """trim_string strips the ends and collapses any run of whitespace to one space"""
+    assert trim_string(field=field) == expected
+
+
+@pytest.mark.parametrize(
+    "char", [chr(i) for i in range(0x110000) if chr(i).isspace()], ids=ascii
+)
+def test_trim_string_fast_path(char):
+    """Clean single-line fields skip the regex, which is only sound if every whitespace
+    character other than a lone space fails isprintable() and so takes the slow path"""
+    assert trim_string(field=f"Bob{char}Jones") == "Bob Jones"
+    assert trim_string(field=f"Bob {char}Jones") == "Bob Jones"
+
+
+@pytest.mark.parametrize("body", ['{"a": 1, "b": 2}', b'{"a": 1, "b": 2}'])
+def test_validate_request_body_json(body):
+    """A str or bytes body is parsed and returned when it has the required keys"""
+    assert validate_request_body_json(body=body, required_keys=["a"]) == {
+        "a": 1,
+        "b": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "body,required_keys",
+    [
+        ("not json", None),
+        (b'"\xff"', None),  # Bytes that aren't valid UTF-8
+        ('{"a": 1}', ["a", "b"]),
+        ('[{"a": 1}]', ["a"]),  # Only an object can have keys
+    ],
+)
+def test_validate_request_body_json_invalid(body, required_keys):
+    """Unparseable bodies and bodies missing required keys raise ValueError"""
+    with pytest.raises(ValueError, match="Invalid payload"):
+        validate_request_body_json(body=body, required_keys=required_keys)
+
+
+def test_validate_request_body_json_array():
+    """An array body is returned as-is when no keys are required"""
+    assert validate_request_body_json(body=b"[1, 2]") == [1, 2]